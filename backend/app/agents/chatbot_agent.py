@@ -7,6 +7,8 @@ from langchain_experimental.agents import create_pandas_dataframe_agent
 from langchain.agents.agent_types import AgentType
 
 from ..llm.gemini_client import get_gemini_llm
+from ..models.dataset import Dataset
+from ..services.pipeline_service import load_shared_clean_dataset
 
 
 class DataChatbotAgent:
@@ -48,3 +50,15 @@ class DataChatbotAgent:
                 "error": str(e),
                 "query": query,
             }
+
+
+def get_chatbot(ds: Dataset) -> DataChatbotAgent:
+    """
+    DataChatbotAgent for the dataset's cleaned data. The parquet file is
+    read once and the frame shared across requests (load_shared_clean_dataset);
+    each agent gets its own Copy-on-Write copy, since the agent runs
+    model-written code that may modify its frame and one user's query must
+    not leak into the next.
+    """
+    df = load_shared_clean_dataset(ds)
+    return DataChatbotAgent(df.copy(deep=False))
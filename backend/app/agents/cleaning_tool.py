@@ -4,6 +4,7 @@ from typing import Dict, Any, List
 from pathlib import Path
 
 import pandas as pd
+import polars as pl
 
 from ..core.config import settings
 
@@ -17,52 +18,76 @@ def run_cleaning(df: pd.DataFrame, dataset_id: int) -> Dict[str, Any]:
       - saves cleaned data to Parquet in CLEAN_DIR
 
     Returns a dict with:
-      - clean_df_json: cleaned dataframe as list-of-dicts
+      - clean_lf: cleaned data as a Polars LazyFrame (in-memory handoff, nothing copied
+        or converted until a consumer collects it)
       - clean_path: path to saved parquet file
+      - rows / cols: shape of the cleaned data
       - log: list of text messages describing what was done
     """
     log: List[str] = []
 
     log.append(f"Initial shape: {df.shape[0]} rows, {df.shape[1]} columns")
 
-    # Drop duplicates
-    duplicates = df.duplicated().sum()
-    if duplicates > 0:
-        df = df.drop_duplicates()
-        log.append(f"Dropped {duplicates} duplicate rows. New shape: {df.shape}")
+    # Heavy lifting runs in Polars (multi-threaded, Arrow memory)
+    pdf = pl.from_pandas(df)
+
+    # Drop duplicates in a single hashing pass; the count is the row delta
+    rows_before = pdf.height
+    pdf = pdf.unique(maintain_order=True)
+    dropped = rows_before - pdf.height
+    if dropped > 0:
+        log.append(f"Dropped {dropped} duplicate rows. New shape: {pdf.shape}")
     else:
         log.append("No duplicate rows found.")
 
-    # Handle missing values
-    for col in df.columns:
-        if pd.api.types.is_numeric_dtype(df[col]):
-            missing = df[col].isna().sum()
-            if missing > 0:
-                mean_val = df[col].mean()
-                df[col] = df[col].fillna(mean_val)
-                log.append(f"Filled {missing} missing values in numeric column '{col}' with mean={mean_val:.4f}.")
-        else:
-            missing = df[col].isna().sum()
-            if missing > 0:
-                mode_series = df[col].mode()
-                if len(mode_series) > 0:
-                    mode_val = mode_series.iloc[0]
-                    df[col] = df[col].fillna(mode_val)
-                    log.append(f"Filled {missing} missing values in categorical column '{col}' with mode='{mode_val}'.")
-                else:
-                    log.append(f"Column '{col}' has missing values but no mode; left as-is.")
+    # Handle missing values: gather all fill values in one pass, then fill in one pass
+    missing_before = pdf.null_count().row(0, named=True)
+    # Partition columns by dtype from the schema once (no per-column projection)
+    num_missing: List[str] = []
+    obj_missing: List[str] = []
+    for col, dtype in pdf.schema.items():
+        if missing_before[col] > 0:
+            if dtype.is_numeric():
+                num_missing.append(col)
+            else:
+                obj_missing.append(col)
+
+    if num_missing or obj_missing:
+        fill_values = pdf.select(
+            [pl.col(c).mean() for c in num_missing]
+            + [pl.col(c).drop_nulls().mode().sort().first() for c in obj_missing]
+        ).row(0, named=True)
+
+        pdf = pdf.with_columns(
+            [pl.col(c).fill_null(v) for c, v in fill_values.items() if v is not None]
+        )
+
+        for col in num_missing:
+            if fill_values[col] is not None:
+                log.append(f"Filled {missing_before[col]} missing values in numeric column '{col}' with mean={fill_values[col]:.4f}.")
+            else:
+                log.append(f"Column '{col}' has missing values but no mean; left as-is.")
+        for col in obj_missing:
+            if fill_values[col] is not None:
+                log.append(f"Filled {missing_before[col]} missing values in categorical column '{col}' with mode='{fill_values[col]}'.")
+            else:
+                log.append(f"Column '{col}' has missing values but no mode; left as-is.")
 
     # Ensure CLEAN_DIR exists
     clean_dir = Path(settings.CLEAN_DIR)
     clean_dir.mkdir(parents=True, exist_ok=True)
 
     clean_path = clean_dir / f"dataset_{dataset_id}_clean.parquet"
-    df.to_parquet(clean_path, index=False)
+    # zstd + 128k-row groups: smaller files and faster re-reads for the
+    # download / EDA / chatbot paths (Polars dictionary-encodes strings itself)
+    pdf.write_parquet(clean_path, compression="zstd", compression_level=3, row_group_size=131072)
 
     log.append(f"Saved cleaned dataset to: {clean_path}")
 
     return {
-        "clean_df_json": df.to_dict(orient="records"),
+        "clean_lf": pdf.lazy(),
         "clean_path": str(clean_path),
         "log": log,
+        "rows": pdf.height,
+        "cols": pdf.width,
     }
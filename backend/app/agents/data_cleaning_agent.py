@@ -1,7 +1,9 @@
 from typing import Dict, Any, Optional, List
 
 import pandas as pd
+import polars as pl
 
+from ..services.ingestion_service import dedupe_column_names
 from .base_agent import BaseAgent, AgentResult
 
 
@@ -19,65 +21,86 @@ class DataCleaningAgent(BaseAgent):
 
     def run(self, df: pd.DataFrame, config: Optional[Dict[str, Any]] = None) -> AgentResult:
         config = config or {}
-        df_clean = df.copy()
         log_entries: List[str] = []
 
-        # 1. Normalize column names (strip + replace spaces with underscores, lowercased)
-        original_cols = list(df_clean.columns)
-        new_cols = []
-        for c in original_cols:
-            if isinstance(c, str):
-                nc = c.strip().lower().replace(" ", "_")
-            else:
-                nc = str(c)
-            new_cols.append(nc)
-        df_clean.columns = new_cols
+        # 1. Normalize column names (strip + replace spaces with underscores, lowercased).
+        #    No upfront df.copy(): with Copy-on-Write, set_axis returns a new frame
+        #    that shares data with `df` until a column is actually written.
+        original_cols = list(df.columns)
+        new_cols = list(
+            df.columns.astype(str).str.strip().str.lower().str.replace(" ", "_", regex=False)
+        )
+        # e.g. 'A' and 'a' collide once lower-cased; Polars needs unique names
+        new_cols = dedupe_column_names(new_cols)
+        df_clean = df.set_axis(new_cols, axis=1)
         if original_cols != new_cols:
             log_entries.append(
                 f"Normalized column names: {dict(zip(original_cols, new_cols))}"
             )
 
-        # 2. Infer better dtypes
-        before_dtypes = df_clean.dtypes.astype(str).to_dict()
-        df_clean = df_clean.infer_objects()
-        after_dtypes = df_clean.dtypes.astype(str).to_dict()
-        if before_dtypes != after_dtypes:
-            log_entries.append(f"Inferred dtypes. Before: {before_dtypes}, After: {after_dtypes}")
+        # 2. Infer better dtypes (only object columns can change, so skip the
+        #    pass on already-typed frames, e.g. Arrow-backed or parquet-loaded)
+        before = df_clean.dtypes
+        if (before == object).any():
+            df_clean = df_clean.infer_objects()
+            after = df_clean.dtypes
+            if tuple(before) != tuple(after):
+                before_dtypes = before.astype(str).to_dict()
+                after_dtypes = after.astype(str).to_dict()
+                log_entries.append(f"Inferred dtypes. Before: {before_dtypes}, After: {after_dtypes}")
 
-        # 3. Handle missing values (mean for numeric, mode/'UNKNOWN' for non-numeric)
-        for col in df_clean.columns:
-            missing_count = df_clean[col].isna().sum()
-            if missing_count == 0:
-                continue
+        # 3. Handle missing values (mean for numeric, mode/'UNKNOWN' for non-numeric).
+        #    Fill values are gathered in one Polars pass and applied in another.
+        pdf = pl.from_pandas(df_clean)
+        missing_counts = pdf.null_count().row(0, named=True)
+        # Partition columns by dtype from the schema once (no per-column projection)
+        num_missing: List[str] = []
+        obj_missing: List[str] = []
+        for col, dtype in pdf.schema.items():
+            if missing_counts[col] > 0:
+                if dtype.is_numeric():
+                    num_missing.append(col)
+                else:
+                    obj_missing.append(col)
+
+        if num_missing or obj_missing:
+            fill_values = pdf.select(
+                [pl.col(c).mean() for c in num_missing]
+                + [pl.col(c).drop_nulls().mode().sort().first() for c in obj_missing]
+            ).row(0, named=True)
 
-            if pd.api.types.is_numeric_dtype(df_clean[col]):
-                mean_val = df_clean[col].mean()
-                df_clean[col] = df_clean[col].fillna(mean_val)
+            pdf = pdf.with_columns(
+                [pl.col(c).fill_null(fill_values[c]) for c in num_missing if fill_values[c] is not None]
+                + [pl.col(c).fill_null(fill_values[c] if fill_values[c] is not None else "UNKNOWN") for c in obj_missing]
+            )
+
+            for col in num_missing:
+                mean_val = fill_values[col] if fill_values[col] is not None else float("nan")
                 log_entries.append(
-                    f"Filled {missing_count} missing values in numeric column '{col}' with mean={mean_val:.4f}."
+                    f"Filled {missing_counts[col]} missing values in numeric column '{col}' with mean={mean_val:.4f}."
                 )
-            else:
-                mode_series = df_clean[col].mode(dropna=True)
-                if not mode_series.empty:
-                    mode_val = mode_series.iloc[0]
-                    df_clean[col] = df_clean[col].fillna(mode_val)
+            for col in obj_missing:
+                if fill_values[col] is not None:
                     log_entries.append(
-                        f"Filled {missing_count} missing values in categorical column '{col}' with mode='{mode_val}'."
+                        f"Filled {missing_counts[col]} missing values in categorical column '{col}' with mode='{fill_values[col]}'."
                     )
                 else:
-                    df_clean[col] = df_clean[col].fillna("UNKNOWN")
                     log_entries.append(
-                        f"Filled {missing_count} missing values in column '{col}' with 'UNKNOWN' (no mode available)."
+                        f"Filled {missing_counts[col]} missing values in column '{col}' with 'UNKNOWN' (no mode available)."
                     )
 
         # 4. Simple metadata summary
         metadata = {
             "log": log_entries,
             "rows_before": len(df),
-            "rows_after": len(df_clean),
-            "cols": len(df_clean.columns),
+            "rows_after": pdf.height,
+            "cols": pdf.width,
             "missing_before": df.isna().sum().to_dict(),
-            "missing_after": df_clean.isna().sum().to_dict(),
+            "missing_after": pdf.null_count().row(0, named=True),
         }
 
+        # Downstream agents (EDA, report) work on pandas; Arrow-backed columns
+        # are a zero-copy view over the Polars buffers (strings stay Arrow strings)
+        df_clean = pdf.to_pandas(use_pyarrow_extension_array=True)
+
         return AgentResult(data=df_clean, metadata=metadata)
@@ -1,13 +1,105 @@
+import multiprocessing
+import os
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 from .base_agent import BaseAgent, AgentResult
 
 plt.switch_backend("Agg")  # Ensure plotting works on servers (no GUI required)
 
+# Max number of columns drawn in the correlation heatmap
+MAX_CORR_COLS = 50
+
+# Histograms go to the shared process pool only from this many columns on;
+# below that, rendering in-process is cheaper than shipping the tasks
+HIST_POOL_MIN_COLS = 8
+HIST_POOL_MAX_WORKERS = 4
+
+
+def _fast_corr(values: np.ndarray) -> np.ndarray:
+    """
+    Pearson correlation of the columns of `values`. Without missing values
+    this is one GEMM on the standardized matrix. With NaNs, pairwise
+    correlation needs per-pair means/stds, so pandas' DataFrame.corr() is
+    used to get the same result as before.
+
+    Centering/scaling happens in float64 (large-magnitude columns such as
+    epoch timestamps or IDs would lose their variance in float32); only the
+    standardized values go to float32 for the GEMM.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if np.isnan(values).any():
+        return pd.DataFrame(values).corr().to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = ((values - values.mean(axis=0)) / values.std(axis=0)).astype(np.float32)
+        corr = (z.T @ z) / len(z)
+    # Constant / empty columns have no defined correlation
+    corr[~np.isfinite(corr)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _draw_hist(fig, ax, task: Tuple[str, np.ndarray, str]) -> str:
+    """
+    Draw one histogram PNG on a reused figure.
+    Bins are computed with np.histogram and drawn as bars.
+    """
+    col, values, fig_path = task
+    values = values[~np.isnan(values)]
+    counts, edges = np.histogram(values, bins=20)
+
+    ax.clear()
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge")
+    ax.set_title(f"Histogram of {col}")
+    ax.set_xlabel(col)
+    ax.set_ylabel("Frequency")
+    fig.tight_layout()
+    fig.savefig(fig_path)
+
+    return fig_path
+
+
+# One figure per worker process, cleared and redrawn for every column
+_hist_fig = None
+_hist_ax = None
+
+
+def _render_hist(task: Tuple[str, np.ndarray, str]) -> str:
+    """
+    Pool entry point: render one histogram on the worker's figure.
+    """
+    global _hist_fig, _hist_ax
+    if _hist_fig is None:
+        _hist_fig, _hist_ax = plt.subplots(figsize=(7, 4))
+    return _draw_hist(_hist_fig, _hist_ax, task)
+
+
+@lru_cache(maxsize=1)
+def get_hist_pool() -> ProcessPoolExecutor:
+    """
+    Process-wide pool for histogram rendering, shared by all EDA runs.
+    Workers are spawned rather than forked: forking the multi-threaded
+    server process (uvicorn, Polars/Arrow thread pools) can deadlock.
+    """
+    return ProcessPoolExecutor(
+        max_workers=min(HIST_POOL_MAX_WORKERS, os.cpu_count() or 1),
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def shutdown_hist_pool() -> None:
+    """
+    Stop the pool's workers if it was ever started in this process.
+    """
+    if get_hist_pool.cache_info().currsize:
+        get_hist_pool().shutdown()
+        get_hist_pool.cache_clear()
+
 
 class EDAAgent(BaseAgent):
     """
@@ -29,7 +121,23 @@ class EDAAgent(BaseAgent):
         # -----------------------------
         # Basic info
         # -----------------------------
-        summary_stats = df.describe(include="all").to_dict()
+        # Dtype-partitioned aggregates instead of describe(include="all"),
+        # keeping describe()'s keys
+        numeric_df = df.select_dtypes(include=[np.number])
+        summary_stats: Dict[str, Dict[str, Any]] = {}
+        if not numeric_df.empty:
+            num_stats = numeric_df.agg(["count", "mean", "std", "min", "max"])
+            quantiles = numeric_df.quantile([0.25, 0.5, 0.75])
+            quantiles.index = ["25%", "50%", "75%"]
+            summary_stats.update(pd.concat([num_stats, quantiles]).to_dict())
+        for col in df.columns.difference(numeric_df.columns, sort=False):
+            counts = df[col].value_counts()
+            summary_stats[col] = {
+                "count": int(counts.sum()),
+                "unique": len(counts),
+                "top": counts.index[0] if len(counts) else None,
+                "freq": int(counts.iloc[0]) if len(counts) else None,
+            }
         meta_log.append("Generated summary statistics.")
 
         # Missing values
@@ -39,10 +147,21 @@ class EDAAgent(BaseAgent):
         # -----------------------------
         # Correlation matrix (numeric only)
         # -----------------------------
-        numeric_df = df.select_dtypes(include=[np.number])
         corr_path = None
         if len(numeric_df.columns) > 1:
-            corr = numeric_df.corr()
+            # Beyond MAX_CORR_COLS the heatmap is unreadable anyway; keep the
+            # highest-variance columns so rendering cost stays bounded.
+            corr_df = numeric_df
+            if len(corr_df.columns) > MAX_CORR_COLS:
+                top_cols = corr_df.var().nlargest(MAX_CORR_COLS).index
+                corr_df = corr_df[top_cols]
+                meta_log.append(f"Correlation matrix limited to the {MAX_CORR_COLS} highest-variance columns.")
+
+            corr = pd.DataFrame(
+                _fast_corr(corr_df.to_numpy(dtype=np.float64, na_value=np.nan)),
+                index=corr_df.columns,
+                columns=corr_df.columns,
+            )
             corr_path = output_dir / "correlation_matrix.png"
 
             plt.figure(figsize=(10, 6))
@@ -61,20 +180,20 @@ class EDAAgent(BaseAgent):
         # -----------------------------
         # Histograms for numeric features
         # -----------------------------
-        hist_paths = []
+        # Each figure is independent and CPU-bound, so many of them are
+        # rendered in the shared process pool; only the column's ndarray is
+        # pickled, not the whole frame. A few are cheaper to draw in-process.
+        tasks = [
+            (col, df[col].to_numpy(dtype=np.float64, na_value=np.nan), str(output_dir / f"hist_{col}.png"))
+            for col in numeric_df.columns
+        ]
+        if len(tasks) >= HIST_POOL_MIN_COLS:
+            hist_paths = list(get_hist_pool().map(_render_hist, tasks))
+        else:
+            fig, ax = plt.subplots(figsize=(7, 4))
+            hist_paths = [_draw_hist(fig, ax, task) for task in tasks]
+            plt.close(fig)
         for col in numeric_df.columns:
-            fig_path = output_dir / f"hist_{col}.png"
-
-            plt.figure(figsize=(7, 4))
-            plt.hist(df[col].dropna(), bins=20)
-            plt.title(f"Histogram of {col}")
-            plt.xlabel(col)
-            plt.ylabel("Frequency")
-            plt.tight_layout()
-            plt.savefig(fig_path)
-            plt.close()
-
-            hist_paths.append(str(fig_path))
             meta_log.append(f"Saved histogram for {col}.")
 
         # -----------------------------
@@ -1,15 +1,19 @@
 # backend/app/agents/eda_tool.py
 
-from typing import Dict, Any
+from typing import Dict, Any, Union
 from pathlib import Path
 import json
 
 import pandas as pd
+import polars as pl
 
 from ..core.config import settings
 
 
-def run_basic_eda(df: pd.DataFrame, dataset_id: int) -> Dict[str, Any]:
+_DESCRIBE_QUANTILES = (("25%", 0.25), ("50%", 0.5), ("75%", 0.75))
+
+
+def run_basic_eda(df: Union[pd.DataFrame, pl.DataFrame, pl.LazyFrame], dataset_id: int) -> Dict[str, Any]:
     """
     Compute basic EDA stats:
       - shape
@@ -18,32 +22,65 @@ def run_basic_eda(df: pd.DataFrame, dataset_id: int) -> Dict[str, Any]:
       - numeric describe()
       - top values for categorical columns
 
+    Everything is computed in Polars: the shape/missing/describe aggregates
+    form one lazy query, and all queries are collected together in a single
+    parallel pass. pandas input is converted (zero-copy for Arrow columns).
+
     Also saves EDA JSON to EDA_DIR.
     """
 
+    if isinstance(df, pd.DataFrame):
+        df = pl.from_pandas(df)
+    lf = df.lazy()
+    schema = lf.collect_schema()
+
+    num_cols = [col for col, dtype in schema.items() if dtype.is_numeric()]
+    cat_cols = [col for col, dtype in schema.items() if dtype in (pl.String, pl.Categorical, pl.Enum)]
+
+    # One select for row count, null counts and the describe() stats of every
+    # numeric column (aliases are "<col>\0<stat>" to keep names unique)
+    exprs = [pl.len().alias("\0rows")]
+    exprs += [pl.col(col).null_count().alias(f"{col}\0missing") for col in schema]
+    for col in num_cols:
+        c = pl.col(col)
+        exprs += [
+            c.count().alias(f"{col}\0count"),
+            c.mean().alias(f"{col}\0mean"),
+            c.std().alias(f"{col}\0std"),
+            c.min().alias(f"{col}\0min"),
+        ]
+        exprs += [c.quantile(q, interpolation="linear").alias(f"{col}\0{name}") for name, q in _DESCRIBE_QUANTILES]
+        exprs.append(c.max().alias(f"{col}\0max"))
+
+    # Top-5 values per categorical column, as separate plans in the same collect
+    top_queries = [
+        lf.select(pl.col(col).drop_nulls().alias("value").value_counts(sort=True).head(5)).unnest("value")
+        for col in cat_cols
+    ]
+    stats_df, *top_dfs = pl.collect_all([lf.select(exprs)] + top_queries)
+    stats = stats_df.row(0, named=True)
+
     results: Dict[str, Any] = {}
 
     # Shape
-    results["shape"] = {"rows": df.shape[0], "cols": df.shape[1]}
+    results["shape"] = {"rows": stats["\0rows"], "cols": len(schema)}
 
     # Dtypes
-    results["dtypes"] = {col: str(dtype) for col, dtype in df.dtypes.items()}
+    results["dtypes"] = {col: str(dtype) for col, dtype in schema.items()}
 
     # Missing values
-    results["missing_per_column"] = df.isna().sum().to_dict()
+    results["missing_per_column"] = {col: stats[f"{col}\0missing"] for col in schema}
 
-    # Numeric summary
-    num_df = df.select_dtypes(include="number")
-    if not num_df.empty:
-        results["numeric_describe"] = num_df.describe().to_dict()
+    # Numeric summary (same layout as pandas describe().to_dict())
+    if num_cols:
+        stat_names = ["count", "mean", "std", "min"] + [name for name, _ in _DESCRIBE_QUANTILES] + ["max"]
+        results["numeric_describe"] = {
+            col: {name: stats[f"{col}\0{name}"] for name in stat_names} for col in num_cols
+        }
 
     # Categorical summary
-    cat_df = df.select_dtypes(include=["object", "category"])
-    if not cat_df.empty:
-        top_values = {}
-        for col in cat_df.columns:
-            top_values[col] = cat_df[col].value_counts().head(5).to_dict()
-        results["categorical_top_values"] = top_values
+    if cat_cols:
+        results["categorical_top_values"] = {col: dict(top.rows()) for col, top in zip(cat_cols, top_dfs)}
 
     # Save EDA JSON to disk
     eda_dir = Path(settings.EDA_DIR)
@@ -1,38 +1,141 @@
+from string import Template
 from textwrap import dedent
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import orjson
+import pandas as pd
 
 from ..core.config import settings
+from ..llm.gemini_client import get_gemini_llm
+
+
+_MARKDOWN_KEYS = (
+    "overview_markdown",
+    "summary_stats_markdown",
+    "column_summary_markdown",
+    "correlations_markdown",
+    "plots_markdown",
+)
+
+# Dataset-specific schema/stats used as the semantic-cache key: near-identical
+# values mean a near-identical dataset, unlike the shared report template.
+_SEMANTIC_KEYS = (
+    "summary_stats",
+    "missing_values",
+    "summary_stats_markdown",
+    "column_summary_markdown",
+)
+
+
+# Identical for every report, so it goes first and can be served from the
+# Gemini context cache (GEMINI_CONTEXT_CACHE_ENABLED) instead of being re-sent.
+_REPORT_INSTRUCTIONS = dedent(
+    """
+    You are a senior data analyst. I will give you a rough exploratory data
+    analysis (EDA) report in Markdown for a dataset.
+
+    Rewrite it as a clear, concise, business-friendly report with sections:
+
+    - Dataset overview
+    - Data quality & cleaning
+    - Key statistics and distributions
+    - Correlations and relationships
+    - Notable insights and recommendations
+
+    Keep important numbers and trends, but you can remove low-level technical details.
+    """
+)
+
+
+# Per-dataset part, dedented/parsed once at import; only substitution per call
+_REPORT_PROMPT = Template(
+    dedent(
+        """
+        Dataset name: "$dataset_name"
+
+        Here is the raw EDA output:
+
+        ```markdown
+        $base_text
+        ```
+        """
+    )
+)
+
+_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def format_head_for_prompt(df: pd.DataFrame, n: int = 5) -> str:
+    """
+    Compact CSV preview of the first rows for LLM prompts: bounded number of
+    columns and characters per cell, so wide/long data doesn't blow up tokens.
+    """
+    head = df.head(n).iloc[:, : settings.PROMPT_MAX_COLS]
+    head = head.astype(str).apply(lambda s: s.str[: settings.PROMPT_MAX_CELL_CHARS])
+    return head.to_csv(index=False)
+
+
+def _semantic_text(eda_results: Dict[str, Any]) -> Optional[str]:
+    """
+    Schema and stats slice of the EDA results for semantic-cache lookups,
+    or None (exact caching only) if there is none.
+    """
+    stats = {k: eda_results[k] for k in _SEMANTIC_KEYS if eda_results.get(k)}
+    if not stats:
+        return None
+    return orjson.dumps(stats, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+def _with_head_preview(eda_results: Dict[str, Any], df_head_str: str) -> Dict[str, Any]:
+    """
+    Put a preview of the first rows into the overview section.
+    """
+    overview = eda_results.get("overview_markdown", "")
+    preview = f"First rows of the cleaned data:\n\n```\n{df_head_str}\n```"
+    return {**eda_results, "overview_markdown": f"{overview}\n\n{preview}" if overview else preview}
+
+
+def generate_report(df_head_str: str, eda_results: Dict[str, Any], dataset_name: str) -> str:
+    """
+    Functional entry point used by pipeline.data_pipeline.
+    """
+    return ReportAgent().generate_report(dataset_name, _with_head_preview(eda_results, df_head_str))
 
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
+
+def stream_report(df_head_str: str, eda_results: Dict[str, Any], dataset_name: str) -> Iterator[str]:
+    """
+    Streaming counterpart of generate_report().
+    """
+    return ReportAgent().stream_report(dataset_name, _with_head_preview(eda_results, df_head_str))
 
 
 class ReportAgent:
     """
     Takes EDA results + dataset name and produces a human-readable report.
 
-    If LLM_PROVIDER=gemini and GEMINI_API_KEY is set, it will call Gemini.
+    If LLM_PROVIDER=gemini and GEMINI_API_KEY is set, it will call Gemini
+    (through GeminiRESTLLM).
     Otherwise, it falls back to a plain text report built from the EDA outputs.
     """
 
     def __init__(self) -> None:
         self.provider = (settings.LLM_PROVIDER or "none").lower()
-        self.model_name = settings.LLM_MODEL or "gemini-2.5-flash-lite"
 
-        self.gemini_model = None
+        # Gemini via the REST LangChain LLM (pooled session, response caches)
+        self.llm = None
         if self.provider == "gemini":
-            if genai is None:
-                # google-generativeai not installed, we will fall back to plain text
-                print("[ReportAgent] google-generativeai not installed, using fallback.")
-            elif not settings.GEMINI_API_KEY:
+            if not settings.GEMINI_API_KEY:
                 print("[ReportAgent] GEMINI_API_KEY not set, using fallback.")
             else:
-                print(f"[ReportAgent] Initializing Gemini model: {self.model_name}")
-                genai.configure(api_key=settings.GEMINI_API_KEY)
-                # This class handles the correct endpoint/version for you
-                self.gemini_model = genai.GenerativeModel(self.model_name)
+                self.llm = get_gemini_llm()
+
+    def stream_run(self, df: pd.DataFrame, eda_metadata: Dict[str, Any], dataset_name: str) -> Iterator[str]:
+        """
+        Agent-style entry point used by pipeline_service: streams the report
+        built from EDAAgent metadata plus a preview of the cleaned data.
+        """
+        eda_results = _with_head_preview(eda_metadata, format_head_for_prompt(df))
+        return self.stream_report(dataset_name, eda_results)
 
     def generate_report(self, dataset_name: str, eda_results: Dict[str, Any]) -> str:
         """
@@ -42,45 +145,95 @@ class ReportAgent:
           - column_summary_markdown
           - correlations_markdown
           - plots_markdown
+        Any other keys are included in the raw EDA section as JSON.
         """
         base_text = self._build_plain_report(dataset_name, eda_results)
 
         # If Gemini isn't configured properly, just return the plain report
-        if self.gemini_model is None:
+        if self.llm is None:
             return base_text + "\n\n[Note: Gemini not configured, showing plain EDA summary.]"
 
-        prompt = dedent(
-            f"""
-            You are a senior data analyst. I will give you a rough exploratory data
-            analysis (EDA) report in Markdown for a dataset called "{dataset_name}".
+        prompt = self._build_prompt(dataset_name, base_text)
+
+        try:
+            text = self.llm.invoke(
+                prompt, static_prefix=_REPORT_INSTRUCTIONS, semantic_text=_semantic_text(eda_results)
+            )
+        except Exception as e:
+            # Never crash the pipeline if Gemini fails – just annotate the fallback.
+            return base_text + f"\n\n[LLM (Gemini) call failed: {e}]"
+        return self._finish(base_text, text)
+
+    def generate_reports(self, items: List[Tuple[pd.DataFrame, Dict[str, Any], str]]) -> List[str]:
+        """
+        Batch entry point for several datasets at once: items are
+        (head sample, EDAAgent metadata, dataset name), as for stream_run.
+        All prompts go out concurrently over the LLM's pooled connection
+        instead of one blocking round-trip each. Results keep input order.
+        """
+        names = [name for _, _, name in items]
+        base_texts = [
+            self._build_plain_report(name, _with_head_preview(eda, format_head_for_prompt(df)))
+            for df, eda, name in items
+        ]
+
+        if self.llm is None:
+            return [b + "\n\n[Note: Gemini not configured, showing plain EDA summary.]" for b in base_texts]
 
-            Rewrite it as a clear, concise, business-friendly report with sections:
+        prompts = [self._build_prompt(name, b) for name, b in zip(names, base_texts)]
 
-            - Dataset overview
-            - Data quality & cleaning
-            - Key statistics and distributions
-            - Correlations and relationships
-            - Notable insights and recommendations
+        try:
+            texts = self.llm.generate_batch(
+                prompts,
+                static_prefix=_REPORT_INSTRUCTIONS,
+                semantic_texts=[_semantic_text(eda) for _, eda, _ in items],
+            )
+        except Exception as e:
+            return [b + f"\n\n[LLM (Gemini) call failed: {e}]" for b in base_texts]
+        return [self._finish(b, t) for b, t in zip(base_texts, texts)]
 
-            Keep important numbers and trends, but you can remove low-level technical details.
+    def stream_report(self, dataset_name: str, eda_results: Dict[str, Any]) -> Iterator[str]:
+        """
+        Same as generate_report, but yields the report as the LLM produces it
+        so callers can forward/persist chunks before generation has finished.
+        """
+        base_text = self._build_plain_report(dataset_name, eda_results)
 
-            Here is the raw EDA output:
+        if self.llm is None:
+            yield base_text + "\n\n[Note: Gemini not configured, showing plain EDA summary.]"
+            return
 
-            ```markdown
-            {base_text}
-            ```
-            """
-        )
+        prompt = self._build_prompt(dataset_name, base_text)
 
+        got_text = False
         try:
-            response = self.gemini_model.generate_content(prompt)
-            text = getattr(response, "text", None) or ""
-            if not text.strip():
-                return base_text + "\n\n[Gemini returned empty text, showing plain EDA summary.]"
-            return text.strip()
+            semantic_text = _semantic_text(eda_results)
+            for text in self.llm.stream(prompt, static_prefix=_REPORT_INSTRUCTIONS, semantic_text=semantic_text):
+                if text:
+                    got_text = True
+                    yield text
         except Exception as e:
-            # Never crash the pipeline if Gemini fails – just annotate the fallback.
-            return base_text + f"\n\n[LLM (Gemini) call failed: {e}]"
+            # Never crash the stream if Gemini fails – annotate and fall back.
+            if got_text:
+                yield f"\n\n[LLM (Gemini) stream interrupted: {e}]"
+            else:
+                yield base_text + f"\n\n[LLM (Gemini) call failed: {e}]"
+            return
+
+        if not got_text:
+            yield base_text + "\n\n[Gemini returned empty text, showing plain EDA summary.]"
+
+    def _finish(self, base_text: str, text: str) -> str:
+        if not (text or "").strip():
+            return base_text + "\n\n[Gemini returned empty text, showing plain EDA summary.]"
+        return text.strip()
+
+    def _build_prompt(self, dataset_name: str, base_text: str) -> str:
+        """
+        Dataset-specific part of the prompt; the shared instructions are sent
+        separately as the LLM's static prefix (see _REPORT_INSTRUCTIONS).
+        """
+        return _REPORT_PROMPT.substitute(dataset_name=dataset_name, base_text=base_text)
 
     def _build_plain_report(self, dataset_name: str, eda_results: Dict[str, Any]) -> str:
         """
@@ -107,5 +260,10 @@ class ReportAgent:
             g("plots_markdown", ""),
         ]
 
+        # EDA outputs that aren't pre-rendered markdown (e.g. run_basic_eda / EDAAgent dicts)
+        extra = {k: v for k, v in eda_results.items() if k not in _MARKDOWN_KEYS}
+        if extra:
+            sections += ["", "## Raw EDA results", "```json", orjson.dumps(extra, default=str, option=_JSON_OPTIONS).decode(), "```"]
+
         # Filter out Nones, join into markdown
         return "\n".join(str(s) for s in sections if s is not None)
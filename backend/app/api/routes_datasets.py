@@ -1,27 +1,42 @@
 # backend/app/api/routes_datasets.py
 
+import asyncio
+import json
+import uuid
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, File, UploadFile, Form, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-import pandas as pd
-import io
+import pyarrow.parquet as pq
 
 from ..core.db import get_db
 from ..core.config import settings
+from ..models.chat_session import ChatSession
 from ..models.dataset import Dataset
 from ..models.job import Job
 
+from ..agents.eda_tool import run_basic_eda
+from ..agents.report_agent import format_head_for_prompt, stream_report
 from ..services.ingestion_service import (
     save_uploaded_file,
+    finalize_upload,
     register_dataset,
-    load_dataset_raw,
+    load_dataset_file,
     basic_validate_df,
 )
 
-from ..services.pipeline_service import run_cleaning_pipeline, run_eda_pipeline
+from ..services.pipeline_service import (
+    create_job,
+    load_clean_dataset,
+    run_cleaning_pipeline,
+    run_eda_pipeline,
+    run_full_pipeline_job,
+    run_job_in_background,
+    run_report_batch_in_background,
+    run_report_pipeline,
+)
 
 
 # ------------------------------------------------------
@@ -48,23 +63,25 @@ async def upload_dataset(
     description: Optional[str] = Form(None),
     db: Session = Depends(get_db),
 ):
-    raw_path = save_uploaded_file(file, settings.RAW_DIR)
-    ds = register_dataset(db, name=name, raw_path=raw_path, description=description)
-
+    # Stream the upload to a temp file in constant memory and parse it from
+    # disk; blocking I/O, parsing and the DB commit stay off the event loop
+    tmp_path = await asyncio.to_thread(save_uploaded_file, file, settings.RAW_DIR)
     try:
-        df = load_dataset_raw(ds)
-    except Exception as e:
-        Path(ds.raw_path).unlink(missing_ok=True)
-        db.delete(ds)
-        db.commit()
-        raise HTTPException(status_code=400, detail=f"Failed to read file: {e}")
-
-    ok, msg = basic_validate_df(df)
-    if not ok:
-        Path(ds.raw_path).unlink(missing_ok=True)
-        db.delete(ds)
-        db.commit()
-        raise HTTPException(status_code=400, detail=msg)
+        try:
+            df = await asyncio.to_thread(load_dataset_file, tmp_path)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Failed to read file: {e}")
+
+        ok, msg = basic_validate_df(df)
+        if not ok:
+            raise HTTPException(status_code=400, detail=msg)
+    except HTTPException:
+        # Rejected uploads don't stay on disk
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    raw_path = finalize_upload(tmp_path, file.filename)
+    ds = await asyncio.to_thread(register_dataset, db, name=name, raw_path=raw_path, description=description)
 
     return {
         "dataset_id": ds.id,
@@ -100,25 +117,98 @@ def get_dataset(dataset_id: int, db: Session = Depends(get_db)):
 # RUN BASIC CLEANING PIPELINE (old method)
 # ------------------------------------------------------
 @router.post("/{dataset_id}/run_cleaning", response_model=dict)
-def run_cleaning(dataset_id: int, db: Session = Depends(get_db)):
+def run_cleaning(dataset_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """
+    Schedules cleaning in the background and returns the job id immediately.
+    Poll /datasets/jobs/{job_id} for progress.
+    """
     ds = db.query(Dataset).filter(Dataset.id == dataset_id).first()
     if ds is None:
         raise HTTPException(status_code=404, detail="Dataset not found")
 
-    try:
-        cleaned_ds, job = run_cleaning_pipeline(db, dataset_id)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Cleaning failed: {e}")
+    job = create_job(db, dataset_id=dataset_id, job_type="cleaning")
+    background_tasks.add_task(run_job_in_background, run_cleaning_pipeline, dataset_id, job.id)
+
+    return {
+        "job_id": job.id,
+        "dataset_id": dataset_id,
+        "job_status": job.status,
+    }
+
+
+# ------------------------------------------------------
+# RUN EDA / REPORT PIPELINES (background jobs)
+# ------------------------------------------------------
+def _schedule_cleaned_dataset_job(
+    db: Session,
+    background_tasks: BackgroundTasks,
+    dataset_id: int,
+    job_type: str,
+    runner,
+) -> dict:
+    """
+    Validate the dataset synchronously, then run `runner` in the background
+    so plotting / LLM work never ties up the request.
+    """
+    ds = db.query(Dataset).filter(Dataset.id == dataset_id).first()
+    if ds is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    if not ds.clean_path:
+        raise HTTPException(status_code=400, detail="Dataset not cleaned yet.")
+
+    job = create_job(db, dataset_id=dataset_id, job_type=job_type)
+    background_tasks.add_task(run_job_in_background, runner, dataset_id, job.id)
 
     return {
         "job_id": job.id,
-        "dataset_id": cleaned_ds.id,
-        "dataset_status": cleaned_ds.status,
-        "clean_path": cleaned_ds.clean_path,
+        "dataset_id": dataset_id,
         "job_status": job.status,
     }
 
 
+@router.post("/{dataset_id}/run_eda", response_model=dict)
+def run_eda(dataset_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    return _schedule_cleaned_dataset_job(db, background_tasks, dataset_id, "eda", run_eda_pipeline)
+
+
+@router.post("/{dataset_id}/run_report", response_model=dict)
+def run_report(dataset_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    return _schedule_cleaned_dataset_job(db, background_tasks, dataset_id, "report", run_report_pipeline)
+
+
+@router.post("/run_report_batch", response_model=dict)
+def run_report_batch(
+    background_tasks: BackgroundTasks,
+    dataset_ids: List[int] = Body(..., embed=True),
+    db: Session = Depends(get_db),
+):
+    """
+    Schedules reports for several cleaned datasets as one batched LLM round;
+    returns one job id per dataset (poll /datasets/jobs/{job_id}).
+    """
+    dataset_ids = list(dict.fromkeys(dataset_ids))
+    if not dataset_ids:
+        raise HTTPException(status_code=400, detail="No dataset ids given.")
+
+    datasets = {ds.id: ds for ds in db.query(Dataset).filter(Dataset.id.in_(dataset_ids)).all()}
+    for dataset_id in dataset_ids:
+        ds = datasets.get(dataset_id)
+        if ds is None:
+            raise HTTPException(status_code=404, detail=f"Dataset {dataset_id} not found")
+        if not ds.clean_path:
+            raise HTTPException(status_code=400, detail=f"Dataset {dataset_id} not cleaned yet.")
+
+    jobs = [create_job(db, dataset_id=dataset_id, job_type="report") for dataset_id in dataset_ids]
+    background_tasks.add_task(run_report_batch_in_background, [job.id for job in jobs])
+
+    return {
+        "jobs": [
+            {"job_id": job.id, "dataset_id": job.dataset_id, "job_status": job.status}
+            for job in jobs
+        ],
+    }
+
+
 # ------------------------------------------------------
 # JOB STATUS
 # ------------------------------------------------------
@@ -135,6 +225,7 @@ def get_job(job_id: int, db: Session = Depends(get_db)):
         "status": job.status,
         "log": job.log,
         "report_path": job.report_path,
+        "eda_metadata_path": job.eda_metadata_path,
         "created_at": job.created_at,
         "updated_at": job.updated_at,
     }
@@ -144,7 +235,7 @@ def get_job(job_id: int, db: Session = Depends(get_db)):
 # DOWNLOAD CLEANED CSV
 # ------------------------------------------------------
 @router.get("/{dataset_id}/download_clean")
-def download_cleaned_dataset(dataset_id: int, db: Session = Depends(get_db)):
+def download_cleaned_dataset(dataset_id: int, format: str = "csv", db: Session = Depends(get_db)):
     ds = db.query(Dataset).filter(Dataset.id == dataset_id).first()
 
     if not ds:
@@ -153,17 +244,36 @@ def download_cleaned_dataset(dataset_id: int, db: Session = Depends(get_db)):
     if not ds.clean_path:
         raise HTTPException(status_code=400, detail="Dataset not cleaned yet.")
 
+    # Parquet: send the file straight from disk
+    if format == "parquet":
+        if not Path(ds.clean_path).exists():
+            raise HTTPException(status_code=500, detail="Cleaned dataset file not found.")
+        return FileResponse(
+            ds.clean_path,
+            media_type="application/octet-stream",
+            filename=f"cleaned_dataset_{dataset_id}.parquet",
+        )
+
+    if format != "csv":
+        raise HTTPException(status_code=400, detail=f"Unsupported format: {format}")
+
+    # CSV: convert batch by batch so memory stays constant
     try:
-        df = pd.read_parquet(ds.clean_path)
+        pf = pq.ParquetFile(ds.clean_path, pre_buffer=True)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to load cleaned dataset: {e}")
 
-    stream = io.StringIO()
-    df.to_csv(stream, index=False)
-    stream.seek(0)
+    def iter_csv():
+        header = True
+        for batch in pf.iter_batches(batch_size=65536, use_threads=True):
+            yield batch.to_pandas().to_csv(index=False, header=header).encode("utf-8")
+            header = False
+        if header:
+            # No rows: still send the column header
+            yield pf.schema_arrow.empty_table().to_pandas().to_csv(index=False).encode("utf-8")
 
     return StreamingResponse(
-        iter([stream.getvalue()]),
+        iter_csv(),
         media_type="text/csv",
         headers={
             "Content-Disposition": f"attachment; filename=cleaned_dataset_{dataset_id}.csv"
@@ -175,60 +285,108 @@ def download_cleaned_dataset(dataset_id: int, db: Session = Depends(get_db)):
 # FULL LANGCHAIN MULTI-AGENT PIPELINE ENDPOINT
 # ------------------------------------------------------
 @router.post("/{dataset_id}/run_pipeline", response_model=dict)
-def run_full_pipeline_api(dataset_id: int, db: Session = Depends(get_db)):
+def run_full_pipeline_api(dataset_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     """
-    Runs complete multi-agent pipeline:
+    Schedules the complete multi-agent pipeline in the background:
         1. Cleaning
         2. EDA
         3. Report Generation
+
+    Returns the job id immediately; poll /datasets/jobs/{job_id} for progress.
     """
     ds = db.query(Dataset).filter(Dataset.id == dataset_id).first()
     if ds is None:
         raise HTTPException(status_code=404, detail="Dataset not found")
 
-    # Step 1: Load raw data
-    try:
-        df = load_dataset_raw(ds)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to load dataset: {e}")
+    job = create_job(db, dataset_id=dataset_id, job_type="full_pipeline")
+    background_tasks.add_task(run_job_in_background, run_full_pipeline_job, dataset_id, job.id)
 
-    # Step 2: Run full pipeline
-    from ..pipeline.data_pipeline import run_full_pipeline
-    try:
-        result = run_full_pipeline(
-            raw_df=df,
-            dataset_id=dataset_id,
-            dataset_name=ds.name
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Pipeline execution failed: {e}")
+    return {
+        "dataset_id": dataset_id,
+        "job_id": job.id,
+        "status": job.status,
+    }
 
-    # Step 3: Save cleaned dataset path
-    ds.clean_path = result["clean_path"]
-    ds.status = "pipeline_complete"
-    db.commit()
 
-    # Step 4: Save report
-    report_path = settings.REPORT_DIR / f"dataset_{dataset_id}_report.md"
-    with open(report_path, "w", encoding="utf-8") as f:
-        f.write(result["report_text"])
-
-    # Step 5: Save job
-    job = Job(
-        dataset_id=dataset_id,
-        type="full_pipeline",
-        status="done",
-        log=str(result.get("clean_log")),
-        report_path=str(report_path)
+# ------------------------------------------------------
+# STREAM REPORT (Gemini streaming)
+# ------------------------------------------------------
+@router.get("/{dataset_id}/report_stream")
+def stream_report_api(dataset_id: int, db: Session = Depends(get_db)):
+    """
+    Streams the markdown report to the client as the LLM generates it,
+    writing the same chunks to the report file as they arrive.
+    """
+    ds = db.query(Dataset).filter(Dataset.id == dataset_id).first()
+    if ds is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    try:
+        clean_df = load_clean_dataset(ds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    eda_result = run_basic_eda(clean_df, dataset_id)
+    chunks = stream_report(
+        df_head_str=format_head_for_prompt(clean_df),
+        eda_results=eda_result,
+        dataset_name=ds.name,
     )
-    db.add(job)
+
+    settings.REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    report_path = settings.REPORTS_DIR / f"dataset_{dataset_id}_report.md"
+
+    def iter_report():
+        with open(report_path, "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                yield chunk
+
+    return StreamingResponse(iter_report(), media_type="text/markdown")
+
+
+# ------------------------------------------------------
+# CHAT WITH A CLEANED DATASET
+# ------------------------------------------------------
+@router.post("/{dataset_id}/chat", response_model=dict)
+def chat_with_dataset(
+    dataset_id: int,
+    question: str = Body(..., embed=True),
+    session_token: Optional[str] = Body(None, embed=True),
+    db: Session = Depends(get_db),
+):
+    """
+    Answer a natural-language question about the cleaned dataset and record
+    the exchange in the chat session (a new one if no token is given).
+    """
+    # Imported lazily: the chatbot pulls in the LangChain pandas-agent stack
+    from ..agents.chatbot_agent import get_chatbot
+
+    ds = db.query(Dataset).filter(Dataset.id == dataset_id).first()
+    if ds is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+
+    if session_token:
+        session = (
+            db.query(ChatSession)
+            .filter(ChatSession.session_token == session_token, ChatSession.dataset_id == dataset_id)
+            .first()
+        )
+        if session is None:
+            raise HTTPException(status_code=404, detail="Chat session not found")
+    else:
+        session = ChatSession(dataset_id=dataset_id, session_token=uuid.uuid4().hex)
+        db.add(session)
+
+    try:
+        chatbot = get_chatbot(ds)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result = chatbot.ask(question)
+
+    history = json.loads(session.history) if session.history else []
+    history.append({"q": question, "a": result.get("answer", result.get("error"))})
+    session.history = json.dumps(history)
     db.commit()
 
-    return {
-        "dataset_id": dataset_id,
-        "status": "completed",
-        "clean_path": result["clean_path"],
-        "eda_results": result["eda_results"],
-        "report_path": str(report_path),
-        "job_id": job.id
-    }
+    return {**result, "dataset_id": dataset_id, "session_token": session.session_token}
@@ -1,3 +1,4 @@
+import pandas as pd
 from pydantic_settings import BaseSettings
 from pathlib import Path
 from typing import Optional
@@ -16,6 +17,7 @@ class Settings(BaseSettings):
     CLEAN_DIR: Path = DATA_DIR / "clean"
     REPORTS_DIR: Path = DATA_DIR / "reports"
     EDA_DIR: Path = DATA_DIR / "eda"
+    CACHE_DIR: Path = DATA_DIR / "cache"
 
     # -------- LLM / Agent settings --------
     # LLM_PROVIDER: "none", "gemini", or "openai"
@@ -24,6 +26,24 @@ class Settings(BaseSettings):
     # Default model if not given in .env
     LLM_MODEL: str = "gemini-2.5-flash-lite"
 
+    # LLM response cache (exact prompt match); entries older than the TTL are ignored
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+
+    # Semantic (near-duplicate prompt) cache; needs faiss-cpu + sentence-transformers
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_TTL_SECONDS: int = 24 * 3600
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 5000
+
+    # Gemini server-side context caching (cachedContents) for static prompt prefixes
+    GEMINI_CONTEXT_CACHE_ENABLED: bool = False
+    GEMINI_CONTEXT_CACHE_TTL_SECONDS: int = 3600
+
+    # Data preview sent to the LLM: first rows, at most this many columns,
+    # each cell cut to this many characters (fewer prompt tokens)
+    PROMPT_MAX_COLS: int = 25
+    PROMPT_MAX_CELL_CHARS: int = 40
+
     # API keys (read from .env)
     OPENAI_API_KEY: Optional[str] = None
     GEMINI_API_KEY: Optional[str] = None
@@ -36,3 +56,8 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
+
+
+# Copy-on-Write: derived frames share memory until a column is modified,
+# so agents don't need defensive df.copy() calls.
+pd.set_option("mode.copy_on_write", True)
@@ -1,6 +1,29 @@
+from sqlalchemy import inspect, text
+
 from .db import Base, engine
 from ..models import dataset, job, chat_session
 
 def init_db():
     # Import all models so SQLAlchemy knows them
     Base.metadata.create_all(bind=engine)
+    _upgrade_existing_tables()
+
+
+def _upgrade_existing_tables():
+    """
+    create_all() only creates missing tables; bring tables from an older
+    database up to date: add new (nullable) columns and missing indexes.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing_cols = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing_cols:
+                    col_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+
+            existing_indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=conn)
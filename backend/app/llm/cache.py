@@ -0,0 +1,93 @@
+# backend/app/llm/cache.py
+
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import sha256
+from pathlib import Path
+from typing import Optional
+import json
+import sqlite3
+import threading
+import time
+
+from ..core.config import settings
+
+
+def make_cache_key(model: str, prompt: str, temperature: float, max_tokens: int) -> str:
+    """
+    Deterministic key over everything that changes the LLM request.
+    """
+    raw = json.dumps(
+        {"model": model, "prompt": prompt, "temperature": temperature, "max_tokens": max_tokens},
+        sort_keys=True,
+    )
+    return sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-level cache for LLM responses:
+      - in-process LRU for hot keys
+      - SQLite table llm_cache(key, response, created_at) shared across
+        processes/restarts, with a TTL check on read
+    """
+
+    def __init__(self, db_path: Path, ttl_seconds: int, max_memory_items: int = 256) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_items = max_memory_items
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = int(time.time())
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                response, created_at = hit
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    return response
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                return None
+            self._remember(key, row[0], row[1])
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        now = int(time.time())
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at) VALUES (?, ?, ?)",
+                (key, value, now),
+            )
+            self._conn.commit()
+            self._remember(key, value, now)
+
+    def _remember(self, key: str, value: str, created_at: int) -> None:
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+
+@lru_cache(maxsize=1)
+def get_llm_cache() -> LLMCache:
+    """
+    Process-wide LLMCache stored under settings.CACHE_DIR.
+    """
+    return LLMCache(
+        db_path=Path(settings.CACHE_DIR) / "llm_cache.sqlite3",
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+    )
@@ -1,12 +1,210 @@
 # backend/app/llm/gemini_client.py
 
-from typing import Any, List, Optional
-import json
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, partial
+from hashlib import sha256
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import random
+import threading
+import time
 
+import orjson
 import requests
-from langchain.llms.base import LLM
+from requests.adapters import HTTPAdapter
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
 
 from ..core.config import settings
+from .cache import get_llm_cache, make_cache_key
+from .semantic_cache import get_semantic_cache
+
+
+# Shared HTTP session: keep-alive connections (and their TLS sessions) are
+# reused across Gemini calls instead of doing a fresh handshake per request.
+# Retries are handled in _post_with_retries (backoff + jitter), not by urllib3.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=0))
+
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+_MAX_RETRIES = 3
+# Upper bound for any single wait, including server-sent Retry-After values,
+# so a long Retry-After can't park a worker for hours
+_MAX_BACKOFF_SECONDS = 30.0
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _retry_delay(attempt: int, resp: Optional[requests.Response]) -> float:
+    """
+    Seconds to wait before retry number `attempt` (0-based): honour a numeric
+    Retry-After header, otherwise exponential backoff with jitter; capped at
+    _MAX_BACKOFF_SECONDS either way.
+    """
+    if resp is not None:
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), _MAX_BACKOFF_SECONDS)
+    return min(2 ** attempt + random.random(), _MAX_BACKOFF_SECONDS)
+
+
+_API_BASE = "https://generativelanguage.googleapis.com"
+
+
+@lru_cache(maxsize=None)
+def _model_endpoint(model_name: str, method: str, version: str = "v1") -> str:
+    """
+    Endpoint URL for a model method, built once per (model, method, version).
+    The API key is sent as a header, so URLs don't vary per key.
+    """
+    return f"{_API_BASE}/{version}/models/{model_name}:{method}"
+
+
+def _post_with_retries(
+    url: str,
+    payload: dict,
+    api_key: str,
+    stream: bool = False,
+    max_retries: int = _MAX_RETRIES,
+) -> requests.Response:
+    """
+    POST to Gemini, retrying transient failures (429/5xx, connection errors,
+    timeouts) up to `max_retries` times. Returns the last response;
+    non-retryable statuses are returned immediately for the caller to handle.
+    """
+    # Serialize once with orjson (much faster than requests' stdlib json on
+    # large prompt strings) and reuse the bytes across retries.
+    body = orjson.dumps(payload)
+    headers = {**_JSON_HEADERS, "x-goog-api-key": api_key}
+    for attempt in range(max_retries + 1):
+        try:
+            resp = _SESSION.post(url, data=body, headers=headers, timeout=60, stream=stream)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == max_retries:
+                raise
+            time.sleep(_retry_delay(attempt, None))
+            continue
+
+        if resp.status_code not in _RETRY_STATUSES or attempt == max_retries:
+            return resp
+        resp.close()
+        time.sleep(_retry_delay(attempt, resp))
+
+
+_CACHED_CONTENTS_URL = f"{_API_BASE}/v1beta/cachedContents"
+
+# (model, static prefix hash) -> (cachedContents name or None if creation failed, expiry time)
+_CONTEXT_CACHES: Dict[str, Tuple[Optional[str], float]] = {}
+_CONTEXT_CACHES_LOCK = threading.Lock()
+
+
+def _context_cache_key(model: str, static_prefix: str) -> str:
+    return sha256(f"{model}\n{static_prefix}".encode("utf-8")).hexdigest()
+
+
+def _get_context_cache(model: str, api_key: str, static_prefix: str) -> Optional[str]:
+    """
+    Return the cachedContents name holding `static_prefix` for `model`,
+    creating it on first use / after expiry. Failed creations (e.g. prefix
+    below the API's minimum cacheable size) are remembered for one TTL so we
+    don't retry on every call. Never raises: any failure yields None.
+    """
+    key = _context_cache_key(model, static_prefix)
+    now = time.time()
+    with _CONTEXT_CACHES_LOCK:
+        entry = _CONTEXT_CACHES.get(key)
+    if entry is not None and entry[1] > now:
+        return entry[0]
+
+    ttl = settings.GEMINI_CONTEXT_CACHE_TTL_SECONDS
+    payload = {
+        "model": f"models/{model}",
+        "contents": [{"role": "user", "parts": [{"text": static_prefix}]}],
+        "ttl": f"{ttl}s",
+    }
+    # Optional path: no retries/backoff, callers fall back to the full prompt
+    try:
+        resp = _post_with_retries(_CACHED_CONTENTS_URL, payload, api_key, max_retries=0)
+        name = orjson.loads(resp.content).get("name") if resp.status_code == 200 else None
+        reason = resp.status_code
+    except (requests.RequestException, orjson.JSONDecodeError) as e:
+        name, reason = None, e
+    if name is None:
+        print(f"[GeminiRESTLLM] Context cache unavailable ({reason}), sending full prompts.")
+
+    with _CONTEXT_CACHES_LOCK:
+        # Refresh a bit before the server-side TTL runs out
+        _CONTEXT_CACHES[key] = (name, now + max(ttl - 60, 0))
+    return name
+
+
+def _drop_context_cache(model: str, static_prefix: str) -> None:
+    with _CONTEXT_CACHES_LOCK:
+        _CONTEXT_CACHES.pop(_context_cache_key(model, static_prefix), None)
+
+
+# cache key -> Future of the request currently fetching it (single-flight)
+_INFLIGHT: Dict[str, Future] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
+def _join_flight(key: str) -> Tuple[Future, bool]:
+    """
+    Future for the call currently fetching `key`, and whether the caller is
+    the leader (registered a new one and must run the call itself).
+    """
+    with _INFLIGHT_LOCK:
+        future = _INFLIGHT.get(key)
+        if future is not None:
+            return future, False
+        future = _INFLIGHT[key] = Future()
+        return future, True
+
+
+def _leave_flight(key: str) -> None:
+    # The leader has already filled the response cache, so later callers hit it
+    with _INFLIGHT_LOCK:
+        _INFLIGHT.pop(key, None)
+
+
+def _single_flight(key: str, fn: Callable[[], str]) -> str:
+    """
+    Run fn() for `key` unless an identical call is already in flight, in
+    which case wait for and share its result (or exception).
+    """
+    future, leader = _join_flight(key)
+    if not leader:
+        return future.result()
+
+    try:
+        result = fn()
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _leave_flight(key)
+
+
+def _iter_sse_text(resp: requests.Response) -> Iterator[str]:
+    """
+    Yield the candidate text of each server-sent event of a
+    streamGenerateContent?alt=sse response, closing it when done.
+    """
+    with resp:
+        for line in resp.iter_lines():
+            if not line.startswith(b"data:"):
+                continue
+            data = orjson.loads(line[5:])
+            try:
+                parts = data["candidates"][0]["content"]["parts"]
+            except (KeyError, IndexError, TypeError):
+                # e.g. the final event carrying only finishReason/usage
+                continue
+            for part in parts:
+                piece = part.get("text") if isinstance(part, dict) else None
+                if piece:
+                    yield piece
 
 
 class GeminiRESTLLM(LLM):
@@ -28,16 +226,39 @@ class GeminiRESTLLM(LLM):
     def _llm_type(self) -> str:
         return "gemini-rest"
 
-    def _call(self, prompt: str, stop: Optional[List[str]] = None) -> str:
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        static_prefix: Optional[str] = None,
+        semantic_text: Optional[str] = None,
+        **kwargs: Any,
+    ) -> str:
         """
         Core method LangChain calls. We forward to the official Gemini
         REST endpoint: models/{model}:generateContent (v1).
+
+        `static_prefix` (passed through invoke/stream kwargs) is the part of
+        the prompt shared across calls (instructions); it is prepended to
+        `prompt`, or served from a Gemini context cache when enabled.
+
+        `semantic_text` opts the call into the semantic cache: it is the
+        caller's distinctive description of the request (e.g. a dataset's
+        schema and stats) that is embedded for near-duplicate lookups.
+        Without it, only exact caching applies.
         """
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY is not set in settings/.env.")
 
-        # First try with self.model (from settings or default)
-        text = self._call_once_with_model(prompt, self.model)
+        full_prompt = (static_prefix or "") + prompt
+
+        # Identical requests are served from the response cache
+        cache = get_llm_cache()
+        key = make_cache_key(self.model, full_prompt, self.temperature, self.max_output_tokens)
+        text = cache.get(key)
+        if text is None:
+            # Concurrent identical prompts share one upstream request
+            text = _single_flight(key, partial(self._fetch, key, prompt, static_prefix, semantic_text))
 
         # Respect stop tokens if provided
         if stop:
@@ -47,6 +268,240 @@ class GeminiRESTLLM(LLM):
 
         return text
 
+    def _fetch(
+        self, key: str, prompt: str, static_prefix: Optional[str], semantic_text: Optional[str]
+    ) -> str:
+        """
+        Response-cache miss path of _call: semantic cache, then Gemini
+        (context-cached prefix if enabled, else the full prompt). Fresh
+        responses with any text are stored in the response cache under `key`;
+        semantic hits are not, so an approximate answer never gets pinned to
+        this exact prompt.
+        """
+        text, remember = self._semantic_lookup(semantic_text, static_prefix)
+        if text is not None:
+            return text
+
+        if static_prefix and settings.GEMINI_CONTEXT_CACHE_ENABLED:
+            text = self._call_with_context_cache(static_prefix, prompt)
+
+        if text is None:
+            # First try with self.model (from settings or default)
+            text = self._call_once_with_model((static_prefix or "") + prompt, self.model)
+
+        # Empty (blocked/truncated) responses aren't cached, so they're retried
+        if text:
+            remember(text)
+            get_llm_cache().set(key, text)
+        return text
+
+    def _semantic_lookup(
+        self, semantic_text: Optional[str], static_prefix: Optional[str]
+    ) -> Tuple[Optional[str], Callable[[str], None]]:
+        """
+        Near-duplicate lookup of `semantic_text` (if the semantic cache is
+        enabled and the caller opted in), plus a callback that records a
+        fresh response for it.
+        """
+        sem_cache = get_semantic_cache()
+        if sem_cache is None or not semantic_text:
+            return None, lambda text: None
+
+        scope = self._semantic_scope(static_prefix)
+        embedding = sem_cache.embed(semantic_text)
+        text = sem_cache.lookup(embedding, scope=scope, threshold=settings.SEMANTIC_CACHE_THRESHOLD)
+        return text, partial(sem_cache.add, embedding, scope)
+
+    def _semantic_scope(self, static_prefix: Optional[str]) -> str:
+        """
+        Semantic-cache hits only count for the same model, generation
+        settings and static prefix.
+        """
+        return make_cache_key(self.model, static_prefix or "", self.temperature, self.max_output_tokens)
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        static_prefix: Optional[str] = None,
+        semantic_text: Optional[str] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        """
+        Streaming counterpart of _call, used by LangChain's llm.stream():
+        same caches, single-flight and context cache as _call, but a fresh
+        response is yielded chunk by chunk as Gemini produces it
+        (streamGenerateContent). Cached/shared responses come as one chunk.
+        """
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY is not set in settings/.env.")
+
+        cache = get_llm_cache()
+        key = make_cache_key(self.model, (static_prefix or "") + prompt, self.temperature, self.max_output_tokens)
+        text = cache.get(key)
+        if text is not None:
+            yield GenerationChunk(text=text)
+            return
+
+        # Concurrent identical prompts share one upstream request: followers
+        # get the leader's complete text
+        future, leader = _join_flight(key)
+        if not leader:
+            yield GenerationChunk(text=future.result())
+            return
+
+        pieces: List[str] = []
+        try:
+            for piece in self._fetch_stream(key, prompt, static_prefix, semantic_text):
+                pieces.append(piece)
+                if run_manager is not None:
+                    run_manager.on_llm_new_token(piece)
+                yield GenerationChunk(text=piece)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result("".join(pieces))
+        finally:
+            _leave_flight(key)
+
+    def _fetch_stream(
+        self, key: str, prompt: str, static_prefix: Optional[str], semantic_text: Optional[str]
+    ) -> Iterator[str]:
+        """
+        Streaming miss path, mirroring _fetch: semantic cache, then a
+        streamed Gemini response (context-cached prefix if enabled, else the
+        full prompt). Fresh non-empty text goes to the semantic cache and
+        the response cache (under `key`); semantic hits don't.
+        """
+        text, remember = self._semantic_lookup(semantic_text, static_prefix)
+        if text is not None:
+            yield text
+            return
+
+        resp = None
+        if static_prefix and settings.GEMINI_CONTEXT_CACHE_ENABLED:
+            resp = self._open_context_stream(static_prefix, prompt)
+        if resp is None:
+            resp = self._open_stream((static_prefix or "") + prompt, self.model)
+
+        pieces: List[str] = []
+        for piece in _iter_sse_text(resp):
+            pieces.append(piece)
+            yield piece
+
+        text = "".join(pieces)
+        if text:
+            remember(text)
+            get_llm_cache().set(key, text)
+
+    def _open_stream(self, prompt: str, model_name: str) -> requests.Response:
+        """
+        POST to models/{model}:streamGenerateContent?alt=sse (v1) and return
+        the open streaming response (see _iter_sse_text). Falls back to
+        'gemini-pro' on 404 like _call_once_with_model.
+        """
+        payload = {
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {
+                "temperature": self.temperature,
+                "maxOutputTokens": self.max_output_tokens,
+            },
+        }
+
+        url = _model_endpoint(model_name, "streamGenerateContent") + "?alt=sse"
+        resp = _post_with_retries(url, payload, self.api_key, stream=True)
+        if resp.status_code == 404 and model_name != "gemini-pro":
+            resp.close()
+            url = _model_endpoint("gemini-pro", "streamGenerateContent") + "?alt=sse"
+            resp = _post_with_retries(url, payload, self.api_key, stream=True)
+
+        if resp.status_code != 200:
+            with resp:
+                raise RuntimeError(f"Gemini API error {resp.status_code}: {resp.text}")
+        return resp
+
+    def generate_batch(
+        self,
+        prompts: List[str],
+        static_prefix: Optional[str] = None,
+        semantic_texts: Optional[List[Optional[str]]] = None,
+        max_workers: int = 8,
+    ) -> List[str]:
+        """
+        Run several prompts concurrently over the shared pooled session.
+        Each prompt goes through _call (so the response caches, single-flight
+        and context cache apply), with its entry of `semantic_texts` if
+        given; results are returned in input order.
+        """
+        if not prompts:
+            return []
+        semantic_texts = semantic_texts or [None] * len(prompts)
+
+        def call(prompt: str, semantic_text: Optional[str]) -> str:
+            return self._call(prompt, static_prefix=static_prefix, semantic_text=semantic_text)
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as executor:
+            return list(executor.map(call, prompts, semantic_texts))
+
+    def _context_cache_payload(self, cache_name: str, prompt: str) -> dict:
+        return {
+            "cachedContent": cache_name,
+            "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+            "generationConfig": {
+                "temperature": self.temperature,
+                "maxOutputTokens": self.max_output_tokens,
+            },
+        }
+
+    def _call_with_context_cache(self, static_prefix: str, prompt: str) -> Optional[str]:
+        """
+        generateContent (v1beta) referencing a server-side cachedContents entry
+        for `static_prefix`, so the prefix isn't re-sent or fully re-billed.
+        Returns None when no cache is available or the cached call fails;
+        the caller then sends the full prompt as usual.
+        """
+        cache_name = _get_context_cache(self.model, self.api_key, static_prefix)
+        if cache_name is None:
+            return None
+
+        url = _model_endpoint(self.model, "generateContent", version="v1beta")
+        try:
+            # No retries here: on any failure the full prompt is sent instead
+            payload = self._context_cache_payload(cache_name, prompt)
+            resp = _post_with_retries(url, payload, self.api_key, max_retries=0)
+            if resp.status_code != 200:
+                # Expired/evicted cache (or unsupported model): forget it and fall back
+                _drop_context_cache(self.model, static_prefix)
+                return None
+            return _parse_response_text(orjson.loads(resp.content))
+        except (requests.RequestException, orjson.JSONDecodeError):
+            return None
+
+    def _open_context_stream(self, static_prefix: str, prompt: str) -> Optional[requests.Response]:
+        """
+        Streaming counterpart of _call_with_context_cache: the open
+        streamGenerateContent (v1beta) response, or None if no cache is
+        available or the request fails (the caller then streams the full prompt).
+        """
+        cache_name = _get_context_cache(self.model, self.api_key, static_prefix)
+        if cache_name is None:
+            return None
+
+        url = _model_endpoint(self.model, "streamGenerateContent", version="v1beta") + "?alt=sse"
+        try:
+            resp = _post_with_retries(
+                url, self._context_cache_payload(cache_name, prompt), self.api_key, stream=True, max_retries=0
+            )
+        except requests.RequestException:
+            return None
+        if resp.status_code != 200:
+            resp.close()
+            _drop_context_cache(self.model, static_prefix)
+            return None
+        return resp
+
     def _call_once_with_model(self, prompt: str, model_name: str) -> str:
         """
         Call Gemini generateContent once with a specific model name on v1.
@@ -54,10 +509,7 @@ class GeminiRESTLLM(LLM):
         If the model is not found (404), and model_name is not 'gemini-pro',
         we automatically retry with 'gemini-pro'.
         """
-        url = (
-            f"https://generativelanguage.googleapis.com/v1/models/"
-            f"{model_name}:generateContent?key={self.api_key}"
-        )
+        url = _model_endpoint(model_name, "generateContent")
 
         payload = {
             "contents": [
@@ -73,16 +525,13 @@ class GeminiRESTLLM(LLM):
             },
         }
 
-        resp = requests.post(url, json=payload, timeout=60)
+        resp = _post_with_retries(url, payload, self.api_key)
 
         # If model not found, retry with 'gemini-pro'
         if resp.status_code == 404 and model_name != "gemini-pro":
             fallback_model = "gemini-pro"
-            fallback_url = (
-                f"https://generativelanguage.googleapis.com/v1/models/"
-                f"{fallback_model}:generateContent?key={self.api_key}"
-            )
-            fallback_resp = requests.post(fallback_url, json=payload, timeout=60)
+            fallback_url = _model_endpoint(fallback_model, "generateContent")
+            fallback_resp = _post_with_retries(fallback_url, payload, self.api_key)
 
             if fallback_resp.status_code != 200:
                 raise RuntimeError(
@@ -90,33 +539,37 @@ class GeminiRESTLLM(LLM):
                     f"'gemini-pro': {fallback_resp.text}"
                 )
 
-            data = fallback_resp.json()
+            data = orjson.loads(fallback_resp.content)
         else:
             if resp.status_code != 200:
                 raise RuntimeError(
                     f"Gemini API error {resp.status_code}: {resp.text}"
                 )
-            data = resp.json()
+            data = orjson.loads(resp.content)
+
+        return _parse_response_text(data)
 
-        # Parse the returned text from candidates[0].content.parts[*].text
+
+def _parse_response_text(data: dict) -> str:
+    """
+    Extract the text from candidates[0].content.parts[*].text. Returns ""
+    when there is none (safety block, MAX_TOKENS without parts, ...) and
+    logs the raw response instead.
+    """
+    try:
+        parts = data["candidates"][0]["content"]["parts"]
+        if len(parts) == 1:
+            # Common case: a single text part, no list building
+            text = parts[0].get("text", "")
+        else:
+            text = "".join(p.get("text", "") for p in parts if isinstance(p, dict))
+    except (KeyError, IndexError, TypeError, AttributeError):
         text = ""
-        try:
-            candidates = data.get("candidates", [])
-            if candidates:
-                content = candidates[0].get("content", {})
-                parts = content.get("parts", [])
-                pieces: List[str] = []
-                for part in parts:
-                    if isinstance(part, dict) and "text" in part:
-                        pieces.append(part["text"])
-                text = "".join(pieces)
-        except Exception as e:
-            raise RuntimeError(f"Failed to parse Gemini response: {e}; raw={data}")
-
-        if not text:
-            text = json.dumps(data)
 
-        return text
+    if not text:
+        print(f"[GeminiRESTLLM] No candidate text in response: {orjson.dumps(data).decode()[:500]}")
+
+    return text
 
 
 def get_gemini_llm() -> GeminiRESTLLM:
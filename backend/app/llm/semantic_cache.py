@@ -0,0 +1,140 @@
+# backend/app/llm/semantic_cache.py
+
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional, Tuple
+import json
+import threading
+import time
+
+import numpy as np
+
+from ..core.config import settings
+
+try:
+    import faiss
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    faiss = None
+    SentenceTransformer = None
+
+
+class SemanticCache:
+    """
+    Near-duplicate prompt cache: prompts are embedded with a small
+    sentence-transformers model and looked up by cosine similarity in a
+    FAISS inner-product index (vectors are L2-normalized, so IP == cosine).
+
+    Entries remember the scope they were produced in (LLM model, generation
+    settings, static prompt prefix); a hit only counts within the same scope.
+    Entries expire after SEMANTIC_CACHE_TTL_SECONDS and the oldest ones are
+    dropped beyond SEMANTIC_CACHE_MAX_ENTRIES.
+    """
+
+    # Persist every this many adds, so a crash loses at most a few entries
+    SAVE_EVERY = 16
+
+    def __init__(self, index_path: Path, model_name: str = "sentence-transformers/all-MiniLM-L6-v2") -> None:
+        self.index_path = index_path
+        self.meta_path = index_path.with_suffix(".json")
+        self.encoder = SentenceTransformer(model_name, device="cpu")
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+        # (scope, response, created_at) per index row, oldest first
+        self._entries: List[Tuple[str, str, float]] = []
+        if self.index_path.exists() and self.meta_path.exists():
+            self.index = faiss.read_index(str(self.index_path))
+            # Entries saved without a timestamp predate the TTL: treat as expired
+            self._entries = [
+                (e[0], e[1], e[2] if len(e) > 2 else 0.0)
+                for e in json.loads(self.meta_path.read_text(encoding="utf-8"))
+            ]
+            with self._lock:
+                self._prune()
+        else:
+            self.index = faiss.IndexFlatIP(self.encoder.get_sentence_embedding_dimension())
+
+    def embed(self, prompt: str) -> np.ndarray:
+        vec = self.encoder.encode([prompt], normalize_embeddings=True)
+        return np.asarray(vec, dtype=np.float32)
+
+    def lookup(self, embedding: np.ndarray, scope: str, threshold: float, k: int = 8) -> Optional[str]:
+        with self._lock:
+            if self.index.ntotal == 0:
+                return None
+            scores, ids = self.index.search(embedding, min(k, self.index.ntotal))
+            entries = self._entries
+        cutoff = time.time() - settings.SEMANTIC_CACHE_TTL_SECONDS
+        # Nearest neighbours first; the closest one may belong to another scope
+        for score, idx in zip(scores[0], ids[0]):
+            if idx < 0 or score < threshold:
+                break
+            entry_scope, response, created_at = entries[idx]
+            if entry_scope == scope and created_at >= cutoff:
+                return response
+        return None
+
+    def add(self, embedding: np.ndarray, scope: str, response: str) -> None:
+        with self._lock:
+            self.index.add(embedding)
+            self._entries.append((scope, response, time.time()))
+            self._prune()
+            self._unsaved += 1
+            if self._unsaved >= self.SAVE_EVERY:
+                self._save_locked()
+
+    def save(self) -> None:
+        with self._lock:
+            self._save_locked()
+
+    def _prune(self) -> None:
+        """
+        Drop expired entries and the oldest ones over the cap. Entries are
+        in insertion order, so this is a cut at the front; the flat index is
+        rebuilt from the remaining vectors. Caller holds the lock.
+        """
+        cutoff = time.time() - settings.SEMANTIC_CACHE_TTL_SECONDS
+        start = max(0, len(self._entries) - settings.SEMANTIC_CACHE_MAX_ENTRIES)
+        while start < len(self._entries) and self._entries[start][2] < cutoff:
+            start += 1
+        if start == 0:
+            return
+
+        kept = self.index.reconstruct_n(start, self.index.ntotal - start)
+        self.index = faiss.IndexFlatIP(self.index.d)
+        if len(kept):
+            self.index.add(kept)
+        # New list rather than in-place, so lookups holding the old one stay consistent
+        self._entries = self._entries[start:]
+
+    def _save_locked(self) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        faiss.write_index(self.index, str(self.index_path))
+        self.meta_path.write_text(json.dumps(self._entries), encoding="utf-8")
+        self._unsaved = 0
+
+
+@lru_cache(maxsize=1)
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """
+    Process-wide SemanticCache, or None if disabled in settings or if
+    faiss / sentence-transformers are not installed.
+    """
+    if not settings.SEMANTIC_CACHE_ENABLED:
+        return None
+    if faiss is None or SentenceTransformer is None:
+        print("[SemanticCache] faiss / sentence-transformers not installed, semantic cache disabled.")
+        return None
+    return SemanticCache(index_path=Path(settings.CACHE_DIR) / "semantic.faiss")
+
+
+def save_semantic_cache() -> None:
+    """
+    Persist the index if it was ever loaded in this process.
+    """
+    if get_semantic_cache.cache_info().currsize == 0:
+        return
+    cache = get_semantic_cache()
+    if cache is not None:
+        cache.save()
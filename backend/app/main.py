@@ -1,6 +1,11 @@
+import os
+
+import pyarrow as pa
 from fastapi import FastAPI
 
+from .agents.eda_agent import shutdown_hist_pool
 from .core.init_db import init_db
+from .llm.semantic_cache import save_semantic_cache
 from .api.routes_datasets import router as datasets_router
 
 
@@ -13,6 +18,13 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     def on_startup():
         init_db()
+        # Arrow I/O pool used by parquet reads with pre_buffer
+        pa.set_io_thread_count(min(8, os.cpu_count() or 1))
+
+    @app.on_event("shutdown")
+    def on_shutdown():
+        save_semantic_cache()
+        shutdown_hist_pool()
 
     @app.get("/health")
     def health():
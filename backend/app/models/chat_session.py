@@ -9,7 +9,7 @@ class ChatSession(Base):
 
     id = Column(Integer, primary_key=True, index=True)
 
-    dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=False)
+    dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=False, index=True)
     session_token = Column(String, unique=True, nullable=False)
 
     # We'll store a simple JSON list of {q: "...", a: "..."} pairs as text
@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
 
 from ..core.db import Base
@@ -8,13 +9,15 @@ class Job(Base):
     __tablename__ = "jobs"
 
     id = Column(Integer, primary_key=True, index=True)
-    dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=False)
+    dataset_id = Column(Integer, ForeignKey("datasets.id"), nullable=False, index=True)
 
     type = Column(String, nullable=False)  # e.g. "cleaning", "eda", "report", "pipeline"
-    status = Column(String, nullable=False, default="pending")  # pending, running, done, failed
+    status = Column(String, nullable=False, default="pending", index=True)  # pending, running, done, failed
 
-    log = Column(Text, nullable=True)          # to store messages about what happened
+    # Deferred: only loaded when read (e.g. job status API), not on every refresh
+    log = deferred(Column(Text, nullable=True))  # to store messages about what happened
     report_path = Column(String, nullable=True)  # path to report file if this job generates one
+    eda_metadata_path = Column(String, nullable=True)  # cached EDA metadata JSON used/produced by this job
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
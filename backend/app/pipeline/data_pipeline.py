@@ -6,7 +6,7 @@ import pandas as pd
 
 from ..agents.cleaning_tool import run_cleaning
 from ..agents.eda_tool import run_basic_eda
-from ..agents.report_agent import generate_report
+from ..agents.report_agent import format_head_for_prompt, generate_report
 
 
 def run_full_pipeline(raw_df: pd.DataFrame, dataset_id: int, dataset_name: str) -> Dict[str, Any]:
@@ -31,23 +31,22 @@ def run_full_pipeline(raw_df: pd.DataFrame, dataset_id: int, dataset_name: str)
     # -------------------------
     print("🧹 [Pipeline] Running cleaning step...")
     clean_result = run_cleaning(raw_df, dataset_id)
-    clean_df_json = clean_result["clean_df_json"]
+    clean_lf = clean_result["clean_lf"]
     clean_path = clean_result["clean_path"]
     clean_log = clean_result["log"]
 
-    clean_df = pd.DataFrame(clean_df_json)
-
     # -------------------------
     # 2. EDA step
     # -------------------------
     print("📊 [Pipeline] Running basic EDA...")
-    eda_result = run_basic_eda(clean_df, dataset_id)
+    eda_result = run_basic_eda(clean_lf, dataset_id)
 
     # -------------------------
     # 3. Report generation (Gemini)
     # -------------------------
     print("📝 [Pipeline] Generating report with Gemini...")
-    head_str = clean_df.head().to_string(index=False)
+    # Only the preview rows are materialized as pandas
+    head_str = format_head_for_prompt(clean_lf.head(5).collect().to_pandas())
 
     report_text = generate_report(
         df_head_str=head_str,
@@ -1,30 +1,50 @@
+import shutil
+import tempfile
+from collections import defaultdict
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from fastapi import UploadFile
 from sqlalchemy.orm import Session
 
 from ..core.config import settings
 from ..models.dataset import Dataset
 
+try:
+    import python_calamine  # noqa: F401  (Rust Excel reader, much faster than openpyxl)
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = None  # let pandas pick its default engine
+
 
 def save_uploaded_file(upload_file: UploadFile, dest_dir: Path) -> Path:
     """
-    Save an uploaded file (FastAPI UploadFile) to dest_dir with a unique name.
-    Returns the full path.
+    Stream an uploaded file (FastAPI UploadFile) to a temporary file in
+    dest_dir, keeping the upload's suffix. Returns the temporary path; the
+    caller renames it once the content is accepted (see finalize_upload).
     """
     dest_dir.mkdir(parents=True, exist_ok=True)
-    original_name = upload_file.filename or "uploaded_file"
-    ext = Path(original_name).suffix or ".csv"
-    # Very simple unique name: original name with timestamp could also be used
-    dest_path = dest_dir / original_name
+    suffix = Path(upload_file.filename or "").suffix.lower() or ".csv"
+
+    # Copy in 1 MiB chunks so memory stays constant regardless of upload size
+    with tempfile.NamedTemporaryFile("wb", dir=dest_dir, prefix=".upload_", suffix=suffix, delete=False) as f:
+        shutil.copyfileobj(upload_file.file, f, length=1024 * 1024)
+
+    return Path(f.name)
 
-    with dest_path.open("wb") as f:
-        content = upload_file.file.read()
-        f.write(content)
 
-    return dest_path
+def finalize_upload(tmp_path: Path, filename: Optional[str]) -> Path:
+    """
+    Move an accepted upload from its temporary path to its final name.
+    """
+    name = Path(filename or "uploaded_file").name
+    dest_path = tmp_path.with_name(name)
+    if not dest_path.suffix:
+        dest_path = dest_path.with_suffix(tmp_path.suffix)
+    return tmp_path.replace(dest_path)
 
 
 def register_dataset(
@@ -48,22 +68,73 @@ def register_dataset(
     return ds
 
 
-def load_dataset_raw(ds: Dataset) -> pd.DataFrame:
+def dedupe_column_names(names: List[str]) -> List[str]:
     """
-    Load the raw dataset from disk into a pandas DataFrame.
-    Supports CSV and Excel.
+    Make column names unique the way pd.read_csv does: blank names become
+    'Unnamed: <position>', repeats get '.1', '.2', ... suffixes.
+    (Polars, and therefore cleaning/EDA, rejects duplicate names.)
     """
-    path = Path(ds.raw_path)
-    suffix = path.suffix.lower()
+    counts: Dict[str, int] = defaultdict(int)
+    unique: List[str] = []
+    for i, name in enumerate(names):
+        name = name if name.strip() else f"Unnamed: {i}"
+        cur_count = counts[name]
+        while cur_count > 0:
+            counts[name] = cur_count + 1
+            name = f"{name}.{cur_count}"
+            cur_count = counts[name]
+        counts[name] = cur_count + 1
+        unique.append(name)
+    return unique
+
 
+def _read_dataset(source: Union[Path, BinaryIO], suffix: str) -> pd.DataFrame:
+    """
+    Parse a CSV/Excel source (path or file-like) by file suffix.
+    """
     if suffix == ".csv":
-        return pd.read_csv(path)
+        # Arrow's multi-threaded C++ parser; ArrowDtype columns are zero-copy views.
+        # Blank/"NA" cells in string columns load as nulls, like pd.read_csv.
+        try:
+            table = pacsv.read_csv(
+                source,
+                read_options=pacsv.ReadOptions(use_threads=True, block_size=1 << 22),
+                convert_options=pacsv.ConvertOptions(strings_can_be_null=True),
+            )
+        except pa.ArrowInvalid:
+            # Column types are inferred from the first block; dirty files with a
+            # later value that doesn't fit go through pandas' more lenient parser
+            if not isinstance(source, Path):
+                source.seek(0)
+            return pd.read_csv(source, dtype_backend="pyarrow")
+        # pyarrow keeps duplicate/blank headers verbatim; pandas renames them
+        names = dedupe_column_names(table.column_names)
+        if names != table.column_names:
+            table = table.rename_columns(names)
+        return table.to_pandas(types_mapper=pd.ArrowDtype, self_destruct=True, split_blocks=True)
     elif suffix in (".xlsx", ".xls"):
-        return pd.read_excel(path)
+        return pd.read_excel(source, engine=EXCEL_ENGINE, dtype_backend="pyarrow")
     else:
         raise ValueError(f"Unsupported file type: {suffix}")
 
 
+def load_dataset_raw(ds: Dataset) -> pd.DataFrame:
+    """
+    Load the raw dataset from disk into a pandas DataFrame.
+    Supports CSV and Excel.
+
+    Columns are PyArrow-backed (native null bitmap, no object dtype for strings).
+    """
+    return load_dataset_file(Path(ds.raw_path))
+
+
+def load_dataset_file(path: Path) -> pd.DataFrame:
+    """
+    Parse a CSV/Excel file on disk by its suffix.
+    """
+    return _read_dataset(path, path.suffix.lower())
+
+
 def basic_validate_df(df: pd.DataFrame) -> Tuple[bool, str]:
     """
     Very basic validation: not empty, has at least 1 column.
@@ -1,10 +1,16 @@
+import json
+from functools import lru_cache
 from pathlib import Path
-from typing import Tuple, Optional, Dict, Any
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import case, func, update
 from sqlalchemy.orm import Session
 
 from ..core.config import settings
+from ..core.db import SessionLocal
 from ..models.dataset import Dataset
 from ..models.job import Job
 from .ingestion_service import load_dataset_raw
@@ -42,29 +48,40 @@ def update_job_status(
     job.status = status
 
     if log:
-        if job.log:
-            job.log = job.log + "\n" + log
-        else:
-            job.log = log
+        # Append in SQL so the existing log is never read into Python and
+        # rewritten from the client on every status update
+        db.execute(
+            update(Job)
+            .where(Job.id == job.id)
+            .values(log=case((func.coalesce(Job.log, "") == "", log), else_=Job.log + "\n" + log))
+            .execution_options(synchronize_session=False)
+        )
+        db.expire(job, ["log"])
 
     if report_path is not None:
         job.report_path = report_path
 
+    # Commits any other pending changes in the session too (e.g. the Dataset
+    # row), so each pipeline step costs one COMMIT. No refresh: expired
+    # attributes reload lazily if they are read.
     db.commit()
-    db.refresh(job)
     return job
 
 
-def run_cleaning_pipeline(db: Session, dataset_id: int) -> Tuple[Dataset, Job]:
+def run_cleaning_pipeline(db: Session, dataset_id: int, job: Optional[Job] = None) -> Tuple[Dataset, Job]:
     """
     Load raw dataset, run DataCleaningAgent, save cleaned version,
     update Dataset + Job, and return both.
+
+    If `job` is given (e.g. created by the API before scheduling), it is used
+    instead of creating a new one.
     """
     ds = db.query(Dataset).filter(Dataset.id == dataset_id).first()
     if ds is None:
         raise ValueError("Dataset not found")
 
-    job = create_job(db, dataset_id=dataset_id, job_type="cleaning")
+    if job is None:
+        job = create_job(db, dataset_id=dataset_id, job_type="cleaning")
     update_job_status(db, job, "running", log="Starting data cleaning.")
 
     df_raw = load_dataset_raw(ds)
@@ -75,12 +92,21 @@ def run_cleaning_pipeline(db: Session, dataset_id: int) -> Tuple[Dataset, Job]:
     clean_dir: Path = settings.CLEAN_DIR
     clean_dir.mkdir(parents=True, exist_ok=True)
     clean_path = clean_dir / f"dataset_{ds.id}_clean.parquet"
-    result.data.to_parquet(clean_path, index=False)
+    # Columns are already Arrow-backed; write zstd-compressed,
+    # dictionary-encoded parquet with 128k-row groups
+    result.data.to_parquet(
+        clean_path,
+        index=False,
+        engine="pyarrow",
+        compression="zstd",
+        compression_level=3,
+        row_group_size=131072,
+        use_dictionary=True,
+    )
 
     ds.clean_path = str(clean_path)
     ds.status = "cleaned"
-    db.commit()
-    db.refresh(ds)
+    clear_shared_clean_datasets()
 
     log_lines = result.metadata.get("log", [])
     log_text = "\n".join(log_lines)
@@ -89,19 +115,155 @@ def run_cleaning_pipeline(db: Session, dataset_id: int) -> Tuple[Dataset, Job]:
     return ds, job
 
 
-def load_clean_dataset(ds: Dataset) -> pd.DataFrame:
+def run_full_pipeline_job(db: Session, dataset_id: int, job: Optional[Job] = None) -> Tuple[Dataset, Job]:
+    """
+    Run the complete cleaning -> EDA -> report pipeline (pipeline.data_pipeline),
+    save the report, and update Dataset + Job.
+    """
+    # Imported lazily: the pipeline pulls in the LLM/report stack
+    from ..pipeline.data_pipeline import run_full_pipeline
+
+    ds = db.query(Dataset).filter(Dataset.id == dataset_id).first()
+    if ds is None:
+        raise ValueError("Dataset not found")
+
+    if job is None:
+        job = create_job(db, dataset_id=dataset_id, job_type="full_pipeline")
+    update_job_status(db, job, "running", log="Starting full pipeline.")
+
+    df_raw = load_dataset_raw(ds)
+    result = run_full_pipeline(raw_df=df_raw, dataset_id=dataset_id, dataset_name=ds.name)
+
+    ds.clean_path = result["clean_path"]
+    ds.status = "pipeline_complete"
+    clear_shared_clean_datasets()
+
+    reports_dir: Path = settings.REPORTS_DIR
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    report_path = reports_dir / f"dataset_{dataset_id}_report.md"
+    report_path.write_text(result["report_text"], encoding="utf-8")
+
+    update_job_status(
+        db,
+        job,
+        status="done",
+        log="Pipeline completed.\n" + "\n".join(result.get("clean_log", [])),
+        report_path=str(report_path),
+    )
+
+    return ds, job
+
+
+def run_job_in_background(
+    runner: Callable[..., Any],
+    dataset_id: int,
+    job_id: int,
+) -> None:
     """
-    Load the cleaned dataset from parquet into a pandas DataFrame.
+    Entry point for FastAPI BackgroundTasks: opens its own DB session
+    (the request's session is closed by then), runs `runner` for the
+    pre-created job, and marks the job as failed if it raises.
     """
+    db = SessionLocal()
+    try:
+        job = db.query(Job).filter(Job.id == job_id).first()
+        if job is None:
+            return
+        try:
+            runner(db, dataset_id, job=job)
+        except Exception as e:
+            db.rollback()
+            update_job_status(db, job, status="failed", log=f"Job failed: {e}")
+    finally:
+        db.close()
+
+
+def _clean_parquet_path(ds: Dataset) -> Path:
     if not ds.clean_path:
         raise ValueError("Dataset has not been cleaned yet.")
     path = Path(ds.clean_path)
     if not path.exists():
         raise ValueError(f"Cleaned dataset file not found: {path}")
-    return pd.read_parquet(path)
+    return path
+
+
+def load_clean_dataset(ds: Dataset) -> pd.DataFrame:
+    """
+    Load the cleaned dataset from parquet into a pandas DataFrame
+    (PyArrow-backed columns, no Python object per string cell).
+    The file is memory-mapped so the OS pages data in on demand.
+    """
+    path = _clean_parquet_path(ds)
+    return pd.read_parquet(
+        path, engine="pyarrow", dtype_backend="pyarrow", memory_map=True, pre_buffer=True, use_threads=True
+    )
+
+
+@lru_cache(maxsize=32)
+def _read_shared_clean_dataset(path: str, mtime_ns: int) -> pd.DataFrame:
+    return pd.read_parquet(path, engine="pyarrow", dtype_backend="pyarrow", pre_buffer=True, use_threads=True)
+
+
+def load_shared_clean_dataset(ds: Dataset) -> pd.DataFrame:
+    """
+    Cleaned dataset loaded once and shared between callers (e.g. chatbot
+    requests). The frame is shared: callers that may modify it must work on
+    a copy (with Copy-on-Write, df.copy(deep=False) is cheap and isolates
+    writes). The file's mtime is part of the key, so a rewritten file is
+    never served stale.
+    """
+    path = _clean_parquet_path(ds)
+    return _read_shared_clean_dataset(str(path), path.stat().st_mtime_ns)
+
+
+def clear_shared_clean_datasets() -> None:
+    """
+    Drop all shared frames; called when a dataset is (re-)cleaned so the
+    previous version doesn't stay in memory until LRU eviction.
+    """
+    _read_shared_clean_dataset.cache_clear()
 
 
-def run_eda_pipeline(db: Session, dataset_id: int) -> Tuple[Dataset, Job, Dict[str, Any]]:
+def load_clean_dataset_head(ds: Dataset, n: int = 100) -> pd.DataFrame:
+    """
+    First `n` rows of the cleaned dataset, read from the first row group
+    only (for previews/prompts that don't need the whole frame in memory).
+    """
+    pf = pq.ParquetFile(_clean_parquet_path(ds), memory_map=True)
+    first = next(pf.iter_batches(batch_size=n), None)
+    table = pa.Table.from_batches([first]) if first is not None else pf.schema_arrow.empty_table()
+    return table.to_pandas(types_mapper=pd.ArrowDtype)
+
+
+EDA_METADATA_FILENAME = "metadata.json"
+
+
+def save_eda_metadata(eda_dir: Path, metadata: Dict[str, Any]) -> Path:
+    """
+    Persist EDAAgent metadata next to the plots so later steps can reuse it.
+    """
+    eda_dir.mkdir(parents=True, exist_ok=True)
+    path = eda_dir / EDA_METADATA_FILENAME
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, default=str)
+    return path
+
+
+def load_eda_metadata(eda_dir: Path, clean_path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Return saved EDA metadata, or None if there is none or it predates the
+    current cleaned dataset.
+    """
+    path = eda_dir / EDA_METADATA_FILENAME
+    if not path.exists():
+        return None
+    if clean_path.exists() and path.stat().st_mtime < clean_path.stat().st_mtime:
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run_eda_pipeline(db: Session, dataset_id: int, job: Optional[Job] = None) -> Tuple[Dataset, Job, Dict[str, Any]]:
     """
     Load cleaned dataset, run EDAAgent, save plots, update Job, and return metadata.
     """
@@ -112,7 +274,8 @@ def run_eda_pipeline(db: Session, dataset_id: int) -> Tuple[Dataset, Job, Dict[s
     if not ds.clean_path:
         raise ValueError("Dataset is not cleaned yet. Run cleaning pipeline first.")
 
-    job = create_job(db, dataset_id=dataset_id, job_type="eda")
+    if job is None:
+        job = create_job(db, dataset_id=dataset_id, job_type="eda")
     update_job_status(db, job, "running", log="Starting EDA.")
 
     df_clean = load_clean_dataset(ds)
@@ -121,6 +284,9 @@ def run_eda_pipeline(db: Session, dataset_id: int) -> Tuple[Dataset, Job, Dict[s
     agent = EDAAgent()
     result = agent.run(df=df_clean, dataset_id=ds.id, output_dir=eda_dir)
 
+    metadata_path = save_eda_metadata(eda_dir, result.metadata)
+    job.eda_metadata_path = str(metadata_path)
+
     log_lines = result.metadata.get("log", [])
     log_text = "EDA completed.\n" + "\n".join(log_lines)
 
@@ -135,7 +301,33 @@ def run_eda_pipeline(db: Session, dataset_id: int) -> Tuple[Dataset, Job, Dict[s
     return ds, job, result.metadata
 
 
-def run_report_pipeline(db: Session, dataset_id: int) -> Tuple[Dataset, Job, str]:
+def _report_eda_metadata(ds: Dataset, job: Job) -> Dict[str, Any]:
+    """
+    Reuse EDA metadata saved by run_eda_pipeline if it is newer than the
+    cleaned data; only load the full frame and re-run EDA (plots + stats)
+    when it is missing or stale. The report itself only needs a head sample.
+    """
+    eda_dir: Path = settings.EDA_DIR / f"dataset_{ds.id}"
+    eda_metadata = load_eda_metadata(eda_dir, Path(ds.clean_path))
+    if eda_metadata is None:
+        eda_agent = EDAAgent()
+        eda_metadata = eda_agent.run(df=load_clean_dataset(ds), dataset_id=ds.id, output_dir=eda_dir).metadata
+        save_eda_metadata(eda_dir, eda_metadata)
+    job.eda_metadata_path = str(eda_dir / EDA_METADATA_FILENAME)
+    return eda_metadata
+
+
+def _report_path(ds: Dataset) -> Path:
+    reports_dir: Path = settings.REPORTS_DIR
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    return reports_dir / f"dataset_{ds.id}_eda_report.md"
+
+
+def _dataset_name(ds: Dataset) -> str:
+    return ds.name or f"Dataset {ds.id}"
+
+
+def run_report_pipeline(db: Session, dataset_id: int, job: Optional[Job] = None) -> Tuple[Dataset, Job, str]:
     """
     Run a report-generation pipeline:
     - Ensure dataset is cleaned
@@ -150,29 +342,23 @@ def run_report_pipeline(db: Session, dataset_id: int) -> Tuple[Dataset, Job, str
     if not ds.clean_path:
         raise ValueError("Dataset is not cleaned yet. Run cleaning pipeline first.")
 
-    job = create_job(db, dataset_id=dataset_id, job_type="report")
+    if job is None:
+        job = create_job(db, dataset_id=dataset_id, job_type="report")
     update_job_status(db, job, "running", log="Starting report generation.")
 
-    # Load cleaned data
-    df_clean = load_clean_dataset(ds)
+    eda_metadata = _report_eda_metadata(ds, job)
 
-    # Re-run EDA here to get fresh metadata (or you could reuse stored metadata)
-    eda_dir: Path = settings.EDA_DIR / f"dataset_{ds.id}"
-    eda_agent = EDAAgent()
-    eda_result = eda_agent.run(df=df_clean, dataset_id=ds.id, output_dir=eda_dir)
-
-    # Generate report text using LLM (or fallback)
+    # Generate report text using LLM (or fallback), streamed to file as it is
+    # produced so a failure mid-way still leaves the partial report on disk
     report_agent = ReportAgent()
-    dataset_name = ds.name or f"Dataset {ds.id}"
-    report_result = report_agent.run(df=df_clean, eda_metadata=eda_result.metadata, dataset_name=dataset_name)
-
-    report_text = report_result.data if isinstance(report_result.data, str) else str(report_result.data)
-
-    # Save report to file
-    reports_dir: Path = settings.REPORTS_DIR
-    reports_dir.mkdir(parents=True, exist_ok=True)
-    report_path = reports_dir / f"dataset_{ds.id}_eda_report.md"
-    report_path.write_text(report_text, encoding="utf-8")
+    report_path = _report_path(ds)
+    chunks = report_agent.stream_run(
+        df=load_clean_dataset_head(ds), eda_metadata=eda_metadata, dataset_name=_dataset_name(ds)
+    )
+    with report_path.open("w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(chunk)
+            f.flush()
 
     # Update job
     update_job_status(
@@ -184,3 +370,53 @@ def run_report_pipeline(db: Session, dataset_id: int) -> Tuple[Dataset, Job, str
     )
 
     return ds, job, str(report_path)
+
+
+def run_report_batch_in_background(job_ids: List[int]) -> None:
+    """
+    Entry point for FastAPI BackgroundTasks: generate reports for several
+    datasets (one pre-created "report" job each) with a single batched LLM
+    round instead of one blocking call per dataset. A dataset whose EDA step
+    fails only fails its own job.
+    """
+    db = SessionLocal()
+    try:
+        jobs = db.query(Job).filter(Job.id.in_(job_ids)).all()
+        items = []
+        ready: List[Tuple[Dataset, Job]] = []
+        for job in jobs:
+            ds = db.query(Dataset).filter(Dataset.id == job.dataset_id).first()
+            try:
+                if ds is None or not ds.clean_path:
+                    raise ValueError("Dataset not found or not cleaned yet.")
+                update_job_status(db, job, "running", log="Starting batched report generation.")
+                eda_metadata = _report_eda_metadata(ds, job)
+                items.append((load_clean_dataset_head(ds), eda_metadata, _dataset_name(ds)))
+                ready.append((ds, job))
+            except Exception as e:
+                db.rollback()
+                update_job_status(db, job, status="failed", log=f"Job failed: {e}")
+
+        if not items:
+            return
+
+        try:
+            report_texts = ReportAgent().generate_reports(items)
+        except Exception as e:
+            db.rollback()
+            for _, job in ready:
+                update_job_status(db, job, status="failed", log=f"Job failed: {e}")
+            return
+
+        for (ds, job), report_text in zip(ready, report_texts):
+            report_path = _report_path(ds)
+            report_path.write_text(report_text, encoding="utf-8")
+            update_job_status(
+                db,
+                job,
+                status="done",
+                log="Report generation completed (batched).",
+                report_path=str(report_path),
+            )
+    finally:
+        db.close()